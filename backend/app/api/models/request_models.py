@@ -1,17 +1,43 @@
 """
 Pydantic models for API request/response validation
 """
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any, Literal
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
+from typing import List, Optional, Dict, Any, Literal, Type, TypeVar
 from enum import Enum
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Response models embedding other models: reuse nested instances as-is
+# instead of revalidating/copying them, and don't revalidate when endpoint
+# code mutates fields after construction
+_NO_REVALIDATION = ConfigDict(revalidate_instances="never", validate_assignment=False)
+
+# Base58 alphabet used by Solana addresses (no 0, O, I or l)
+_BASE58_ALPHABET = b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_VALID_START = frozenset(_BASE58_ALPHABET)
+
+def _construct(cls: Type[ModelT], **kw) -> ModelT:
+    """
+    Trusted construction: build a model without running validation.
+
+    Only use this for DTOs assembled from data we produce ourselves
+    (prices x amounts, cached metadata, model output). Untrusted input
+    must still go through model_validate at the request boundary.
+    """
+    return cls.model_construct(**kw)
+
 class RiskAction(str, Enum):
     HOLD = "HOLD"
     BUY_COVER = "BUY_COVER"
     SWAP = "SWAP"
 
 class TokenRisk(BaseModel):
-    """Risk information for a specific token"""
+    """
+    Risk information for a specific token
+
+    Built internally by the risk pipeline, so it supports trusted
+    construction via _construct(TokenRisk, ...)
+    """
     symbol: str
     risk_score: float = Field(..., ge=0, le=100)
     usd_value: float
@@ -28,21 +54,37 @@ class WalletRiskRequest(BaseModel):
     include_explanation: bool = False
     risk_threshold: Optional[float] = Field(None, ge=0, le=100)
     
-    @validator('wallet_address')
-    def validate_wallet_address(cls, v):
+    @model_validator(mode='after')
+    def validate_wallet_address(self) -> "WalletRiskRequest":
         # Basic Solana address validation
-        if not v.startswith(('1', '2', '3', '4', '5', '6', '7', '8', '9', 'A', 'B', 'C', 'D', 'E', 'F')):
+        if ord(self.wallet_address[0]) not in _VALID_START:
             raise ValueError("Invalid Solana wallet address format")
-        return v
+        return self
 
 class BatchRiskRequest(BaseModel):
     """Request model for batch risk evaluation"""
-    wallet_addresses: List[str] = Field(..., min_items=1, max_items=1000)
+    wallet_addresses: List[str] = Field(..., min_length=1, max_length=1000)
     include_explanation: bool = False
     risk_threshold: Optional[float] = Field(None, ge=0, le=100)
+    
+    @model_validator(mode='after')
+    def validate_wallet_addresses(self) -> "BatchRiskRequest":
+        # Check every first character with one C-level translate instead of
+        # running a Python validator per address
+        starts = "".join(address[:1] or " " for address in self.wallet_addresses).encode()
+        if starts.translate(None, _BASE58_ALPHABET):
+            raise ValueError("Invalid Solana wallet address format")
+        return self
 
 class WalletRiskResponse(BaseModel):
-    """Response model for wallet risk evaluation"""
+    """
+    Response model for wallet risk evaluation
+
+    Built internally from predictor output, so it supports trusted
+    construction via _construct(WalletRiskResponse, ...)
+    """
+    model_config = _NO_REVALIDATION
+
     wallet_address: str
     overall_risk_score: float = Field(..., ge=0, le=100)
     recommended_action: RiskAction
@@ -58,7 +100,14 @@ class ExplanationRequest(BaseModel):
     token_risks: List[TokenRisk]
     
 class ExplanationResponse(BaseModel):
-    """Response model for LLM explanation"""
+    """
+    Response model for LLM explanation
+
+    Built internally from LLM/fallback output, so it supports trusted
+    construction via _construct(ExplanationResponse, ...)
+    """
+    model_config = _NO_REVALIDATION
+
     wallet_address: str
     overall_risk_score: float
     recommended_action: RiskAction
@@ -71,4 +120,10 @@ class ExplanationResponse(BaseModel):
 class ErrorResponse(BaseModel):
     """Standard error response"""
     error: str
-    details: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    details: Optional[Dict[str, Any]] = None
+
+# Validators compiled once at import time; reuse these instead of building
+# TypeAdapters (or looping over TokenRisk(**d)) per request.
+# Raw JSON bodies should go through validate_json to skip the json.loads step.
+TokenRiskAdapter = TypeAdapter(TokenRisk)
+TokenRiskListAdapter = TypeAdapter(List[TokenRisk])
@@ -0,0 +1,47 @@
+"""
+msgspec structs and response class for serializing large risk responses
+"""
+from typing import Any, List, Optional
+
+import msgspec
+import numpy as np
+from fastapi.responses import Response
+
+from app.api.models.request_models import RiskAction
+
+class TokenRiskStruct(msgspec.Struct, kw_only=True):
+    """Response-side mirror of TokenRisk (no validation, fixed slots)"""
+    symbol: str
+    risk_score: float
+    usd_value: float
+    portfolio_percentage: float
+    volatility_24h: float
+    liquidity_usd: Optional[float] = None
+    age_days: float
+    centralized_score: float
+    recommended_action: RiskAction
+
+class WalletRiskResponseStruct(msgspec.Struct, kw_only=True):
+    """Response-side mirror of WalletRiskResponse"""
+    wallet_address: str
+    overall_risk_score: float
+    recommended_action: RiskAction
+    at_risk_tokens: List[TokenRiskStruct] = []
+    safe_tokens: List[TokenRiskStruct] = []
+    timestamp: str
+    processing_time_ms: float
+
+def _enc_hook(obj: Any) -> Any:
+    """Encode NumPy scalars (e.g. risk scores straight from the predictor) as Python numbers"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise NotImplementedError(f"Objects of type {type(obj)} are not supported")
+
+_encoder = msgspec.json.Encoder(enc_hook=_enc_hook)
+
+class MsgspecResponse(Response):
+    """JSON response encoded with msgspec, for endpoints returning structs"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return _encoder.encode(content)
@@ -1,54 +1,93 @@
 """
 Configuration settings for the IRIS AI Risk Engine
 """
-from pydantic_settings import BaseSettings
-from typing import List, Optional
+from dataclasses import dataclass, field, fields
+from functools import cached_property
+from typing import Any, Dict, List, Optional, get_type_hints
+import json
 import os
 from pathlib import Path
 
-class Settings(BaseSettings):
+from dotenv import dotenv_values
+
+def _read_env(env_file: str) -> Dict[str, str]:
+    """Read the .env file and the process environment once (environment wins)"""
+    env = {key: value for key, value in dotenv_values(env_file).items() if value is not None}
+    env.update(os.environ)
+    return env
+
+def _coerce(value: str, annotation: Any) -> Any:
+    """Convert a raw environment string to the type of a settings field"""
+    if annotation is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if annotation in (int, float, Path):
+        return annotation(value)
+    if annotation == List[str]:
+        return json.loads(value)
+    return value
+
+@dataclass(frozen=True)
+class Settings:
     # API Settings
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "IRIS AI Risk Engine"
-    CORS_ORIGINS: List[str] = ["*"]
-    
+    CORS_ORIGINS: List[str] = field(default_factory=lambda: ["*"])
+
     # Model paths
     MODEL_PATH: Path = Path("models/risk_model.pkl")
     SCALER_PATH: Path = Path("models/scaler.pkl")
-    
+
     # Data API Keys
-    HELIUS_API_KEY: str = os.getenv("HELIUS_API_KEY", "")
-    HELIUS_RPC_URL: str = f"https://mainnet.helius-rpc.com/?api-key={HELIUS_API_KEY}"
-    COINGECKO_API_KEY: Optional[str] = os.getenv("COINGECKO_API_KEY", "")
-    
+    HELIUS_API_KEY: str = ""
+    COINGECKO_API_KEY: Optional[str] = ""
+
     # Oracle settings
     PYTH_ENDPOINT: str = "https://hermes.pyth.network/v2"
     SWITCHBOARD_ENDPOINT: str = "https://api.switchboard.xyz/api/v2"
-    
+
     # DEX API endpoints
     RAYDIUM_API: str = "https://api.raydium.io/v2"
     ORCA_API: str = "https://api.orca.so"
-    
+
     # LLM settings
     USE_LLM: bool = True
     LLM_PROVIDER: str = "openai"  # Options: "openai", "llama"
-    OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_API_KEY: Optional[str] = ""
     OPENAI_MODEL: str = "gpt-4-turbo"
-    LLAMA_ENDPOINT: Optional[str] = os.getenv("LLAMA_ENDPOINT", "")
-    
+    LLAMA_ENDPOINT: Optional[str] = ""
+    LLM_CACHE_SIZE: int = 1024  # explanations
+    LLM_CACHE_TTL: int = 600  # seconds
+
     # Performance settings
     CACHE_EXPIRY: int = 60  # seconds
+    CACHE_MAXSIZE: int = 8192  # entries
     REQUEST_TIMEOUT: int = 30  # seconds
-    
+    UPSTREAM_RPS: float = 50.0  # requests per second, per upstream host
+    UPSTREAM_MAX_CONCURRENCY: int = 64  # in-flight requests, per upstream host
+    UPSTREAM_MAX_RETRIES: int = 3
+    UPSTREAM_RETRY_BACKOFF: float = 0.5  # seconds, doubled after each retry
+
     # Thresholds
     HIGH_RISK_THRESHOLD: float = 75.0
     MEDIUM_RISK_THRESHOLD: float = 50.0
-    
+
     # Logging
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    LOG_LEVEL: str = "INFO"
+
+    @cached_property
+    def HELIUS_RPC_URL(self) -> str:
+        return f"https://mainnet.helius-rpc.com/?api-key={self.HELIUS_API_KEY}"
+
+    @classmethod
+    def from_env(cls, env_file: str = ".env") -> "Settings":
+        """Build settings from defaults, overridden by .env and environment variables"""
+        env = _read_env(env_file)
+        hints = get_type_hints(cls)
+        overrides = {
+            f.name: _coerce(env[f.name], hints[f.name])
+            for f in fields(cls)
+            if f.name in env
+        }
+        return cls(**overrides)
 
-settings = Settings()
\ No newline at end of file
+settings = Settings.from_env()
@@ -1,50 +1,287 @@
 """
 Data ingestion module for fetching on-chain and market data
 """
+import functools
 import logging
 import aiohttp
 import asyncio
+import ijson
+import numpy as np
+import orjson
 import time
+from cachetools import TTLCache
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Any, Optional, Tuple, Hashable, TypeVar
+from urllib.parse import urlsplit
 
 from app.core.config import settings
 
 logger = logging.getLogger("data")
 
+_FNV_OFFSET = np.uint64(14695981039346656037)
+_FNV_PRIME = np.uint64(1099511628211)
+
+def _stable_hash(keys: List[str]) -> np.ndarray:
+    """
+    Deterministic 64-bit FNV-1a hash of each key, vectorized across keys
+    
+    Unlike hash(), results are stable across processes (no PYTHONHASHSEED
+    randomization), so every server instance simulates the same values.
+    """
+    encoded = [key.encode() for key in keys]
+    raw = np.array(encoded, dtype=bytes)
+    lengths = np.fromiter(map(len, encoded), dtype=np.intp, count=len(encoded))
+    # One row per key, zero-padded to the longest key
+    byte_matrix = raw.view(np.uint8).reshape(len(keys), raw.itemsize)
+    hashes = np.full(len(keys), _FNV_OFFSET, dtype=np.uint64)
+    for position, column in enumerate(byte_matrix.T):
+        # Only mix bytes that belong to each key, so padding never changes a
+        # key's hash and it doesn't depend on the other keys in the batch
+        hashes = np.where(position < lengths, (hashes ^ column) * _FNV_PRIME, hashes)
+    return hashes
+
+class _TickTime:
+    """Most recent ISO timestamp, reused by calls within the same millisecond"""
+    resolution: float = 0.001  # seconds
+    cached_ts: str = ""
+    cached_at: float = float("-inf")
+
+def now_iso() -> str:
+    """
+    Current local time as an ISO 8601 string
+    
+    Responses stamped within the same millisecond share one timestamp, so
+    bursts of concurrent wallet requests skip repeated datetime formatting.
+    """
+    now = time.monotonic()
+    if now - _TickTime.cached_at >= _TickTime.resolution:
+        _TickTime.cached_ts = datetime.now().isoformat()
+        _TickTime.cached_at = now
+    return _TickTime.cached_ts
+
+# JSON-RPC request bodies serialized once at import; per request only the
+# "__NAME__" placeholders are replaced (see _render_rpc)
+_BALANCES_TEMPLATE = orjson.dumps([
+    {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "getTokenAccountsByOwner",
+        "params": [
+            "__ADDRESS__",
+            {"programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"},
+            {"encoding": "jsonParsed"}
+        ]
+    },
+    {
+        "jsonrpc": "2.0",
+        "id": 2,
+        "method": "getBalance",
+        "params": ["__ADDRESS__"]
+    }
+])
+_METADATA_TEMPLATE = orjson.dumps({
+    "jsonrpc": "2.0",
+    "id": "metadata",
+    "method": "getTokenMetadata",
+    "params": ["__BATCH__"]
+})
+_SIGNATURES_TEMPLATE = orjson.dumps({
+    "jsonrpc": "2.0",
+    "id": "my-id",
+    "method": "getSignaturesForAddress",
+    "params": ["__ADDRESS__", {"limit": "__LIMIT__"}]
+})
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# ijson prefixes within the balances batch response. The getBalance result
+# value is a number, while the getTokenAccountsByOwner value is an array of
+# token accounts, so the two can be told apart without waiting for "id".
+_BALANCE_VALUE_PREFIX = "item.result.value"
+_TOKEN_ACCOUNT_PREFIX = "item.result.value.item"
+_TOKEN_MINT_PREFIX = "item.result.value.item.account.data.parsed.info.mint"
+_TOKEN_AMOUNT_PREFIX = "item.result.value.item.account.data.parsed.info.tokenAmount.uiAmount"
+
+def _render_rpc(template: bytes, **values: Any) -> bytes:
+    """Fill the "__NAME__" placeholders of a pre-serialized JSON-RPC body"""
+    for name, value in values.items():
+        template = template.replace(b'"__%s__"' % name.encode(), orjson.dumps(value))
+    return template
+
+T = TypeVar("T")
+
+def ttl_cache_async(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Cache the result of a DataFetcher token-list method in self.cache
+    
+    Entries are keyed on (method name, frozenset of token addresses) and
+    expire with the cache TTL. Empty results are not cached. Concurrent
+    misses for the same key share a single in-flight fetch.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, token_addresses: List[str]) -> T:
+        cache_key = (method.__name__, frozenset(token_addresses))
+        cached = self._get_from_cache(cache_key)
+        if cached:
+            return cached
+        
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(method(self, token_addresses))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        
+        # Shielded so a cancelled caller doesn't cancel the fetch for the others
+        result = await asyncio.shield(task)
+        if result:
+            self._set_cache(cache_key, result)
+        return result
+    
+    return wrapper
+
+# Upstream responses worth retrying with backoff
+_RETRY_STATUSES = (429, 503)
+
+class RateLimiter:
+    """Caps in-flight requests and spaces out calls to a single upstream host"""
+    
+    def __init__(self, rps: float, max_concurrency: int) -> None:
+        """
+        Initialize the rate limiter
+        
+        Args:
+            rps: Maximum requests per second sent to the host
+            max_concurrency: Maximum number of concurrent in-flight requests
+        """
+        self.min_interval = 1.0 / rps
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._last_call = 0.0
+    
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            async with self._lock:
+                loop = asyncio.get_running_loop()
+                wait = self._last_call + self.min_interval - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last_call = loop.time()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
 class DataFetcher:
     """Handles fetching data from various sources"""
     
-    def __init__(self):
-        self.session = None
-        self.cache = {}
-        self.cache_timestamps = {}
+    # HTTP session shared by all instances so Helius, Jupiter, Pyth and the
+    # DEX APIs reuse one keep-alive connection pool
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_lock = asyncio.Lock()
+    # One rate limiter per upstream host, shared by all instances
+    _limiters: Dict[str, RateLimiter] = {}
+    
+    def __init__(self) -> None:
+        # Bounded cache with per-entry expiry; keys are (prefix, wallet) or (prefix, frozenset(tokens))
+        self.cache: TTLCache = TTLCache(maxsize=settings.CACHE_MAXSIZE, ttl=settings.CACHE_EXPIRY)
+        # Fetches currently in progress, keyed like the cache
+        self._inflight: Dict[Tuple[Hashable, ...], asyncio.Future] = {}
+    
+    @classmethod
+    async def get_session(cls) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if cls._session is None or cls._session.closed:
+            async with cls._session_lock:
+                if cls._session is None or cls._session.closed:
+                    connector = aiohttp.TCPConnector(
+                        limit=1024,
+                        limit_per_host=64,
+                        ttl_dns_cache=300,
+                        keepalive_timeout=75
+                    )
+                    cls._session = aiohttp.ClientSession(
+                        connector=connector,
+                        timeout=aiohttp.ClientTimeout(total=settings.REQUEST_TIMEOUT),
+                        json_serialize=lambda obj: orjson.dumps(obj).decode()
+                    )
+        return cls._session
     
     async def initialize(self):
-        """Initialize the HTTP session"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=settings.REQUEST_TIMEOUT)
-            )
+        """Initialize the shared HTTP session"""
+        await self.get_session()
         return self
     
-    async def close(self):
-        """Close the HTTP session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+    @classmethod
+    async def close(cls):
+        """Close the shared HTTP session (call once on application shutdown)"""
+        if cls._session and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+    
+    @classmethod
+    def _get_limiter(cls, url: str) -> RateLimiter:
+        """Get the rate limiter for the host serving the given URL"""
+        host = urlsplit(url).netloc
+        limiter = cls._limiters.get(host)
+        if limiter is None:
+            limiter = RateLimiter(settings.UPSTREAM_RPS, settings.UPSTREAM_MAX_CONCURRENCY)
+            cls._limiters[host] = limiter
+        return limiter
+    
+    @asynccontextmanager
+    async def _request(self, method: str, url: str, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Send a rate-limited request to an upstream API
+        
+        429/503 responses and connection errors are retried with exponential
+        backoff; the final response is yielded whatever its status.
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Extra arguments passed to ClientSession.request
+            
+        Yields:
+            The upstream response
+        """
+        session = await self.get_session()
+        limiter = self._get_limiter(url)
+        retries = settings.UPSTREAM_MAX_RETRIES
+        
+        for attempt in range(retries + 1):
+            async with limiter:
+                try:
+                    response = await session.request(method, url, **kwargs)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt == retries:
+                        raise
+                    logger.warning("Request to %s failed (%r), retrying", urlsplit(url).netloc, e)
+                else:
+                    if response.status not in _RETRY_STATUSES or attempt == retries:
+                        async with response:
+                            yield response
+                        return
+                    logger.warning("Request to %s returned %s, retrying", urlsplit(url).netloc, response.status)
+                    response.release()
+            
+            await asyncio.sleep(2 ** attempt * settings.UPSTREAM_RETRY_BACKOFF)
+    
+    async def _log_failed_response(self, message: str, response: aiohttp.ClientResponse) -> None:
+        """Log a failed upstream response, reading its body only if the record will be emitted"""
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error("%s: %s", message, await response.text())
     
-    def _get_from_cache(self, cache_key: str) -> Optional[Any]:
+    def _get_from_cache(self, cache_key: Tuple[Hashable, ...]) -> Optional[Any]:
         """Get data from cache if fresh"""
-        if cache_key in self.cache:
-            timestamp = self.cache_timestamps.get(cache_key, 0)
-            if time.time() - timestamp < settings.CACHE_EXPIRY:
-                return self.cache[cache_key]
-        return None
+        return self.cache.get(cache_key)
     
-    def _set_cache(self, cache_key: str, data: Any):
+    def _set_cache(self, cache_key: Tuple[Hashable, ...], data: Any) -> None:
         """Set data in cache"""
         self.cache[cache_key] = data
-        self.cache_timestamps[cache_key] = time.time()
     
     async def get_wallet_balances(self, wallet_address: str) -> Dict[str, Any]:
         """
@@ -56,104 +293,103 @@ class DataFetcher:
         Returns:
             Dict containing wallet balance information
         """
-        cache_key = f"balance_{wallet_address}"
+        cache_key = ("balance", wallet_address)
         cached = self._get_from_cache(cache_key)
         if cached:
             return cached
         
         try:
             endpoint = f"{settings.HELIUS_RPC_URL}"
-            payload = {
-                "jsonrpc": "2.0",
-                "id": "my-id",
-                "method": "getTokenAccountsByOwner",
-                "params": [
-                    wallet_address,
-                    {"programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"},
-                    {"encoding": "jsonParsed"}
-                ]
-            }
+            # Token accounts and SOL balance in a single JSON-RPC batch request
+            body = _render_rpc(_BALANCES_TEMPLATE, ADDRESS=wallet_address)
             
-            async with self.session.post(endpoint, json=payload) as response:
+            async with self._request("POST", endpoint, data=body, headers=_JSON_HEADERS) as response:
                 if response.status != 200:
-                    logger.error(f"Failed to fetch wallet balances: {await response.text()}")
+                    await self._log_failed_response("Failed to fetch wallet balances", response)
                     return {"error": "Failed to fetch wallet data", "status": response.status}
                 
-                data = await response.json()
-                result = {
+                result: Dict[str, Any] = {
                     "wallet_address": wallet_address,
-            "tokens": token_data,
-            "total_value_usd": total_value_usd,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        return result
+                    "tokens": [],
+                    "sol_balance": 0,
+                    "timestamp": now_iso()
+                }
+                
+                # Stream the response and keep only mint/amount per token
+                # account, instead of materializing the full JSON document
+                mint, amount = "", None
+                async for prefix, event, value in ijson.parse_async(response.content, use_float=True):
+                    if prefix == _TOKEN_MINT_PREFIX:
+                        mint = value
+                    elif prefix == _TOKEN_AMOUNT_PREFIX:
+                        amount = value
+                    elif prefix == _TOKEN_ACCOUNT_PREFIX:
+                        if event == "start_map":
+                            mint, amount = "", None
+                        elif event == "end_map" and amount and amount > 0:
+                            result["tokens"].append({
+                                "mint": mint,
+                                "amount": float(amount)
+                            })
+                    elif prefix == _BALANCE_VALUE_PREFIX and event == "number":
+                        # Convert lamports to SOL
+                        result["sol_balance"] = value / 1_000_000_000
+                
+                self._set_cache(cache_key, result)
+                return result
+                
+        except Exception as e:
+            logger.error("Error fetching wallet balances: %s", e)
+            return {"error": str(e)}
     
-    def _calculate_token_age(self, wallet_address: str, transactions: List[Dict], token_addresses: List[str]) -> Dict[str, float]:
+    async def get_sol_balances(self, wallet_addresses: List[str]) -> Dict[str, float]:
         """
-        Calculate how long tokens have been held in the wallet
+        Fetch SOL balances for many wallets using batched JSON-RPC requests
         
         Args:
-            wallet_address: Solana wallet address
-            transactions: List of wallet transactions
-            token_addresses: List of token mint addresses
+            wallet_addresses: List of Solana wallet addresses
             
         Returns:
-            Dict mapping token addresses to age in days
+            Dict mapping wallet addresses to their SOL balance
         """
-        # In a real implementation, this would analyze transaction history to find first deposit
-        # For now, we'll simulate with reasonable age values
-        result = {}
-        
-        # Generate pseudo-random but deterministic age values
-        for token_address in token_addresses:
-            # Simulate token age between 1 and 365 days based on address hash
-            result[token_address] = 1 + (hash(f"{wallet_address}_{token_address}") % 365)
+        try:
+            endpoint = f"{settings.HELIUS_RPC_URL}"
+            result: Dict[str, float] = {}
             
-        return result
-                    "tokens": [],
-                    "sol_balance": 0,
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                # Extract token data
-                if "result" in data and "value" in data["result"]:
-                    for item in data["result"]["value"]:
-                        if "account" in item and "data" in item["account"]:
-                            parsed = item["account"]["data"]["parsed"]
-                            if "info" in parsed and "tokenAmount" in parsed["info"]:
-                                token_data = parsed["info"]
-                                mint = token_data.get("mint", "")
-                                amount = float(token_data["tokenAmount"].get("uiAmount", 0))
-                                if amount > 0:
-                                    result["tokens"].append({
-                                        "mint": mint,
-                                        "amount": amount
-                                    })
+            # Bundle up to 100 getBalance calls per HTTP request
+            for i in range(0, len(wallet_addresses), 100):
+                batch = wallet_addresses[i:i+100]
                 
-                # Get SOL balance in a separate call
-                sol_payload = {
-                    "jsonrpc": "2.0",
-                    "id": "my-id",
-                    "method": "getBalance",
-                    "params": [wallet_address]
-                }
+                body = orjson.dumps([
+                    {
+                        "jsonrpc": "2.0",
+                        "id": idx,
+                        "method": "getBalance",
+                        "params": [address]
+                    }
+                    for idx, address in enumerate(batch)
+                ])
                 
-                async with self.session.post(endpoint, json=sol_payload) as sol_response:
-                    if sol_response.status == 200:
-                        sol_data = await sol_response.json()
-                        if "result" in sol_data and "value" in sol_data["result"]:
+                async with self._request("POST", endpoint, data=body, headers=_JSON_HEADERS) as response:
+                    if response.status != 200:
+                        await self._log_failed_response("Failed to fetch SOL balances", response)
+                        continue
+                    
+                    data = orjson.loads(await response.read())
+                    for item in data if isinstance(data, list) else []:
+                        idx = item.get("id")
+                        if isinstance(idx, int) and 0 <= idx < len(batch) and "result" in item:
                             # Convert lamports to SOL
-                            result["sol_balance"] = sol_data["result"]["value"] / 1_000_000_000
-                
-                self._set_cache(cache_key, result)
-                return result
+                            result[batch[idx]] = item["result"].get("value", 0) / 1_000_000_000
+            
+            return result
                 
         except Exception as e:
-            logger.error(f"Error fetching wallet balances: {str(e)}")
-            return {"error": str(e)}
+            logger.error("Error fetching SOL balances: %s", e)
+            return {}
     
-    async def get_token_metadata(self, token_addresses: List[str]) -> Dict[str, Dict]:
+    @ttl_cache_async
+    async def get_token_metadata(self, token_addresses: List[str]) -> Dict[str, Dict[str, Any]]:
         """
         Fetch token metadata (name, symbol, etc.) for multiple tokens
         
@@ -163,32 +399,22 @@ class DataFetcher:
         Returns:
             Dict mapping token addresses to their metadata
         """
-        cache_key = f"metadata_{','.join(sorted(token_addresses))}"
-        cached = self._get_from_cache(cache_key)
-        if cached:
-            return cached
-        
         try:
             endpoint = f"{settings.HELIUS_RPC_URL}"
-            result = {}
+            result: Dict[str, Dict[str, Any]] = {}
             
             # Process in batches of 100 (Helius limit)
             for i in range(0, len(token_addresses), 100):
                 batch = token_addresses[i:i+100]
                 
-                payload = {
-                    "jsonrpc": "2.0",
-                    "id": "metadata",
-                    "method": "getTokenMetadata",
-                    "params": [batch]
-                }
+                body = _render_rpc(_METADATA_TEMPLATE, BATCH=batch)
                 
-                async with self.session.post(endpoint, json=payload) as response:
+                async with self._request("POST", endpoint, data=body, headers=_JSON_HEADERS) as response:
                     if response.status != 200:
-                        logger.error(f"Failed to fetch token metadata: {await response.text()}")
+                        await self._log_failed_response("Failed to fetch token metadata", response)
                         continue
                     
-                    data = await response.json()
+                    data = orjson.loads(await response.read())
                     if "result" in data:
                         for token_address, metadata in data["result"].items():
                             result[token_address] = {
@@ -198,14 +424,13 @@ class DataFetcher:
                                 "logo": metadata.get("logoURI", "")
                             }
             
-            self._set_cache(cache_key, result)
             return result
                 
         except Exception as e:
-            logger.error(f"Error fetching token metadata: {str(e)}")
+            logger.error("Error fetching token metadata: %s", e)
             return {}
     
-    async def get_transaction_history(self, wallet_address: str, limit: int = 100) -> List[Dict]:
+    async def get_transaction_history(self, wallet_address: str, limit: int = 100) -> List[Dict[str, Any]]:
         """
         Fetch transaction history for a wallet
         
@@ -216,29 +441,21 @@ class DataFetcher:
         Returns:
             List of transaction objects
         """
-        cache_key = f"txn_{wallet_address}_{limit}"
+        cache_key = ("txn", wallet_address, limit)
         cached = self._get_from_cache(cache_key)
         if cached:
             return cached
         
         try:
             endpoint = f"{settings.HELIUS_RPC_URL}"
-            payload = {
-                "jsonrpc": "2.0",
-                "id": "my-id",
-                "method": "getSignaturesForAddress",
-                "params": [
-                    wallet_address,
-                    {"limit": limit}
-                ]
-            }
+            body = _render_rpc(_SIGNATURES_TEMPLATE, ADDRESS=wallet_address, LIMIT=limit)
             
-            async with self.session.post(endpoint, json=payload) as response:
+            async with self._request("POST", endpoint, data=body, headers=_JSON_HEADERS) as response:
                 if response.status != 200:
-                    logger.error(f"Failed to fetch transaction history: {await response.text()}")
+                    await self._log_failed_response("Failed to fetch transaction history", response)
                     return []
                 
-                data = await response.json()
+                data = orjson.loads(await response.read())
                 if "result" in data:
                     transactions = data["result"]
                     self._set_cache(cache_key, transactions)
@@ -246,9 +463,10 @@ class DataFetcher:
                 return []
                 
         except Exception as e:
-            logger.error(f"Error fetching transaction history: {str(e)}")
+            logger.error("Error fetching transaction history: %s", e)
             return []
     
+    @ttl_cache_async
     async def get_token_prices(self, token_addresses: List[str]) -> Dict[str, float]:
         """
         Fetch current token prices from CoinGecko or other sources
@@ -259,11 +477,6 @@ class DataFetcher:
         Returns:
             Dict mapping token addresses to their USD prices
         """
-        cache_key = f"prices_{','.join(sorted(token_addresses))}"
-        cached = self._get_from_cache(cache_key)
-        if cached:
-            return cached
-        
         try:
             # For Solana tokens, we need to map mint addresses to CoinGecko IDs
             # This would typically require a separate database or API call
@@ -272,26 +485,26 @@ class DataFetcher:
             jupiter_endpoint = "https://price.jup.ag/v4/price"
             ids_param = ",".join(token_addresses)
             
-            async with self.session.get(f"{jupiter_endpoint}?ids={ids_param}") as response:
+            async with self._request("GET", f"{jupiter_endpoint}?ids={ids_param}") as response:
                 if response.status != 200:
-                    logger.error(f"Failed to fetch token prices: {await response.text()}")
+                    await self._log_failed_response("Failed to fetch token prices", response)
                     return {}
                 
-                data = await response.json()
-                result = {}
+                data = orjson.loads(await response.read())
+                result: Dict[str, float] = {}
                 
                 if "data" in data:
                     for token_address, price_data in data["data"].items():
                         if "price" in price_data:
                             result[token_address] = float(price_data["price"])
                 
-                self._set_cache(cache_key, result)
                 return result
                 
         except Exception as e:
-            logger.error(f"Error fetching token prices: {str(e)}")
+            logger.error("Error fetching token prices: %s", e)
             return {}
     
+    @ttl_cache_async
     async def get_token_volatility(self, token_addresses: List[str]) -> Dict[str, Dict[str, float]]:
         """
         Fetch token volatility metrics from Pyth or Switchboard
@@ -302,32 +515,34 @@ class DataFetcher:
         Returns:
             Dict mapping token addresses to volatility metrics
         """
-        cache_key = f"volatility_{','.join(sorted(token_addresses))}"
-        cached = self._get_from_cache(cache_key)
-        if cached:
-            return cached
-        
         try:
             # In a real implementation, this would call the Pyth API
             # For now, we'll simulate with reasonable volatility values
-            result = {}
+            # Simulate volatility data
+            # In production, this would use the Pyth price feed history
+            hashes = _stable_hash(token_addresses)
+            volatility_1h = 1.2 + (hashes % 100) / 100  # Random between 1.2-2.2%
+            volatility_24h = 4.5 + (hashes % 500) / 100  # Random between 4.5-9.5%
+            price_change_24h = -3.0 + (hashes % 1000) / 100  # -3% to +7%
             
-            for token_address in token_addresses:
-                # Simulate volatility data
-                # In production, this would use the Pyth price feed history
-                result[token_address] = {
-                    "volatility_1h": 1.2 + (hash(token_address) % 100) / 100,  # Random between 1.2-2.2%
-                    "volatility_24h": 4.5 + (hash(token_address) % 500) / 100,  # Random between 4.5-9.5%
-                    "price_change_24h": -3.0 + (hash(token_address) % 1000) / 100,  # -3% to +7%
+            result = {
+                token_address: {
+                    "volatility_1h": vol_1h,
+                    "volatility_24h": vol_24h,
+                    "price_change_24h": change_24h,
                 }
+                for token_address, vol_1h, vol_24h, change_24h in zip(
+                    token_addresses, volatility_1h.tolist(), volatility_24h.tolist(), price_change_24h.tolist()
+                )
+            }
             
-            self._set_cache(cache_key, result)
             return result
                 
         except Exception as e:
-            logger.error(f"Error fetching token volatility: {str(e)}")
+            logger.error("Error fetching token volatility: %s", e)
             return {}
     
+    @ttl_cache_async
     async def get_token_liquidity(self, token_addresses: List[str]) -> Dict[str, float]:
         """
         Fetch token liquidity (TVL) from DEX APIs
@@ -338,29 +553,21 @@ class DataFetcher:
         Returns:
             Dict mapping token addresses to their liquidity in USD
         """
-        cache_key = f"liquidity_{','.join(sorted(token_addresses))}"
-        cached = self._get_from_cache(cache_key)
-        if cached:
-            return cached
-        
         try:
             # In a real implementation, this would query Raydium and Orca APIs
             # For now, we'll simulate with reasonable liquidity values
-            result = {}
+            # Simulate liquidity data based on token address
+            # In production, this would aggregate liquidity across DEXes
+            base_liquidity = 10_000 + (_stable_hash(token_addresses) % 10_000_000)
+            result = dict(zip(token_addresses, base_liquidity.tolist()))
             
-            for token_address in token_addresses:
-                # Simulate liquidity data based on token address
-                # In production, this would aggregate liquidity across DEXes
-                base_liquidity = 10_000 + (hash(token_address) % 10_000_000)
-                result[token_address] = base_liquidity
-            
-            self._set_cache(cache_key, result)
             return result
                 
         except Exception as e:
-            logger.error(f"Error fetching token liquidity: {str(e)}")
+            logger.error("Error fetching token liquidity: %s", e)
             return {}
     
+    @ttl_cache_async
     async def get_whale_concentration(self, token_addresses: List[str]) -> Dict[str, float]:
         """
         Calculate whale concentration score for tokens
@@ -371,26 +578,18 @@ class DataFetcher:
         Returns:
             Dict mapping token addresses to concentration scores (0-1)
         """
-        cache_key = f"whale_{','.join(sorted(token_addresses))}"
-        cached = self._get_from_cache(cache_key)
-        if cached:
-            return cached
-        
         try:
             # In a real implementation, this would analyze on-chain large holders
             # For now, we'll simulate with reasonable concentration values
-            result = {}
-            
-            for token_address in token_addresses:
-                # Simulate concentration score (0-1)
-                # Higher values mean higher concentration (more risk)
-                result[token_address] = 0.2 + (hash(token_address) % 80) / 100  # Between 0.2-1.0
+            # Simulate concentration score (0-1)
+            # Higher values mean higher concentration (more risk)
+            concentration = 0.2 + (_stable_hash(token_addresses) % 80) / 100  # Between 0.2-1.0
+            result = dict(zip(token_addresses, concentration.tolist()))
             
-            self._set_cache(cache_key, result)
             return result
                 
         except Exception as e:
-            logger.error(f"Error calculating whale concentration: {str(e)}")
+            logger.error("Error calculating whale concentration: %s", e)
             return {}
     
     async def get_all_token_data(self, wallet_address: str) -> Dict[str, Any]:
@@ -410,7 +609,7 @@ class DataFetcher:
             return wallet_data
         
         # Extract token addresses
-        token_addresses = [token["mint"] for token in wallet_data.get("tokens", [])]
+        token_addresses: List[str] = [token["mint"] for token in wallet_data.get("tokens", [])]
         
         # Add SOL to the token list
         sol_mint = "So11111111111111111111111111111111111111112"  # Native SOL wrapped address
@@ -426,7 +625,7 @@ class DataFetcher:
             return {
                 "wallet_address": wallet_address,
                 "tokens": [],
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso()
             }
         
         # Fetch all required data in parallel
@@ -444,38 +643,70 @@ class DataFetcher:
         # Calculate token age from transaction history
         token_age = self._calculate_token_age(wallet_address, transactions, token_addresses)
         
-        # Combine all data
-        total_value_usd = 0
-        token_data = []
+        # Combine all data column-wise so value and portfolio share are
+        # computed in one vectorized pass
+        tokens: List[Dict[str, Any]] = wallet_data["tokens"]
+        mints: List[str] = [token["mint"] for token in tokens]
+        amounts = np.fromiter((token["amount"] for token in tokens), dtype=np.float64, count=len(tokens))
+        token_prices = np.fromiter((prices.get(mint, 0) for mint in mints), dtype=np.float64, count=len(mints))
+        values_usd = amounts * token_prices
+        total_value_usd = float(values_usd.sum())
         
-        for token in wallet_data["tokens"]:
-            mint = token["mint"]
-            amount = token["amount"]
-            price = prices.get(mint, 0)
-            value_usd = amount * price
-            
-            token_info = {
+        # Calculate portfolio percentages
+        if total_value_usd > 0:
+            portfolio_pcts = values_usd / total_value_usd * 100
+        else:
+            portfolio_pcts = np.zeros_like(values_usd)
+        
+        # Build per-token dicts only at the output boundary
+        token_data: List[Dict[str, Any]] = []
+        for mint, amount, price, value_usd, portfolio_pct in zip(
+            mints, amounts.tolist(), token_prices.tolist(), values_usd.tolist(), portfolio_pcts.tolist()
+        ):
+            token_metadata = metadata.get(mint, {})
+            token_volatility = volatility.get(mint, {})
+            token_data.append({
                 "mint": mint,
-                "symbol": metadata.get(mint, {}).get("symbol", "UNKNOWN"),
-                "name": metadata.get(mint, {}).get("name", "Unknown Token"),
+                "symbol": token_metadata.get("symbol", "UNKNOWN"),
+                "name": token_metadata.get("name", "Unknown Token"),
                 "amount": amount,
                 "price_usd": price,
                 "value_usd": value_usd,
-                "volatility_1h": volatility.get(mint, {}).get("volatility_1h", 0),
-                "volatility_24h": volatility.get(mint, {}).get("volatility_24h", 0),
-                "price_change_24h": volatility.get(mint, {}).get("price_change_24h", 0),
+                "volatility_1h": token_volatility.get("volatility_1h", 0),
+                "volatility_24h": token_volatility.get("volatility_24h", 0),
+                "price_change_24h": token_volatility.get("price_change_24h", 0),
                 "liquidity_usd": liquidity.get(mint, 0),
                 "centralized_score": whale_concentration.get(mint, 0.5),
-                "age_days": token_age.get(mint, 0)
-            }
-            
-            token_data.append(token_info)
-            total_value_usd += value_usd
-        
-        # Calculate portfolio percentages
-        if total_value_usd > 0:
-            for token in token_data:
-                token["portfolio_percentage"] = (token["value_usd"] / total_value_usd) * 100
+                "age_days": token_age.get(mint, 0),
+                "portfolio_percentage": portfolio_pct
+            })
         
         result = {
-            "wallet_address": wallet_address,
\ No newline at end of file
+            "wallet_address": wallet_address,
+            "tokens": token_data,
+            "total_value_usd": total_value_usd,
+            "timestamp": now_iso()
+        }
+        
+        return result
+    
+    def _calculate_token_age(self, wallet_address: str, transactions: List[Dict[str, Any]], token_addresses: List[str]) -> Dict[str, float]:
+        """
+        Calculate how long tokens have been held in the wallet
+        
+        Args:
+            wallet_address: Solana wallet address
+            transactions: List of wallet transactions
+            token_addresses: List of token mint addresses
+            
+        Returns:
+            Dict mapping token addresses to age in days
+        """
+        # In a real implementation, this would analyze transaction history to find first deposit
+        # For now, we'll simulate with reasonable age values
+        # Generate pseudo-random but deterministic age values
+        # Simulate token age between 1 and 365 days based on address hash
+        hashes = _stable_hash([f"{wallet_address}_{token_address}" for token_address in token_addresses])
+        ages = 1 + (hashes % 365)
+        
+        return dict(zip(token_addresses, ages.tolist()))
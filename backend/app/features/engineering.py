@@ -4,14 +4,18 @@ Feature engineering for risk assessment
 import logging
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
 import joblib
 from pathlib import Path
 
+from app.api.models.request_models import RiskAction
 from app.core.config import settings
 
 logger = logging.getLogger("data")
 
+# Risk actions indexed by the codes computed in FeatureEngineer.determine_risk_actions
+_RISK_ACTIONS = np.array([RiskAction.HOLD, RiskAction.BUY_COVER, RiskAction.SWAP], dtype=object)
+
 class FeatureEngineer:
     """Handles feature generation and normalization for risk modeling"""
     
@@ -24,6 +28,9 @@ class FeatureEngineer:
         """
         self.scaler_path = scaler_path
         self.scaler = None
+        self._scale = None
+        self._min = None
+        self._clip_range = None
         self._load_scaler()
     
     def _load_scaler(self):
@@ -31,13 +38,49 @@ class FeatureEngineer:
         try:
             if self.scaler_path.exists():
                 self.scaler = joblib.load(self.scaler_path)
+                # MinMaxScaler.transform is X * scale_ + min_; keep the arrays so
+                # scaling skips sklearn's per-call input validation
+                if hasattr(self.scaler, "scale_") and hasattr(self.scaler, "min_"):
+                    self._scale = np.asarray(self.scaler.scale_, dtype=np.float32)
+                    self._min = np.asarray(self.scaler.min_, dtype=np.float32)
+                    if getattr(self.scaler, "clip", False):
+                        self._clip_range = self.scaler.feature_range
                 logger.info(f"Loaded scaler from {self.scaler_path}")
             else:
                 logger.warning(f"Scaler not found at {self.scaler_path}, feature scaling will be skipped")
         except Exception as e:
             logger.error(f"Error loading scaler: {str(e)}")
     
-    def generate_features(self, wallet_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Token field -> (feature column, default when missing), in output column order
+    TOKEN_FEATURES: Dict[str, Tuple[str, Any]] = {
+        "mint": ("mint", ""),
+        "symbol": ("symbol", "UNKNOWN"),
+        "name": ("name", "Unknown Token"),
+        "portfolio_percentage": ("portfolio_pct", 0),
+        "age_days": ("age_days", 0),
+        "volatility_24h": ("volatility_24h", 0),
+        "price_change_24h": ("price_change_24h", 0),
+        "liquidity_usd": ("tvl_usd", 0),
+        "centralized_score": ("centralized_score", 0.5),
+        "value_usd": ("value_usd", 0),
+        "price_usd": ("price_usd", 0),
+        "amount": ("amount", 0),
+    }
+    
+    # Numerical feature columns fed to the model, in model input order
+    MODEL_FEATURES: Tuple[str, ...] = (
+        "portfolio_pct",
+        "age_days",
+        "volatility_24h",
+        "price_change_24h",
+        "tvl_usd",
+        "centralized_score",
+        "position_liquidity_ratio",
+        "volatility_age_adjusted",
+        "concentration_risk",
+    )
+    
+    def generate_features(self, wallet_data: Dict[str, Any]) -> pd.DataFrame:
         """
         Generate features for risk assessment from wallet data
         
@@ -45,102 +88,92 @@ class FeatureEngineer:
             wallet_data: Wallet data from the data fetcher
             
         Returns:
-            List of feature dictionaries, one per token
+            DataFrame of features, one row per token
         """
-        features_list = []
-        
         if "tokens" not in wallet_data or not wallet_data["tokens"]:
             logger.warning(f"No tokens found in wallet {wallet_data.get('wallet_address')}")
-            return []
-        
-        # Process each token in the wallet
-        for token in wallet_data["tokens"]:
-            # Skip tokens with zero or very low value
-            if token.get("value_usd", 0) < 0.01:
-                continue
-                
-            # Create feature dictionary
-            features = {
-                "mint": token["mint"],
-                "symbol": token.get("symbol", "UNKNOWN"),
-                "name": token.get("name", "Unknown Token"),
-                "portfolio_pct": token.get("portfolio_percentage", 0),
-                "age_days": token.get("age_days", 0),
-                "volatility_24h": token.get("volatility_24h", 0),
-                "price_change_24h": token.get("price_change_24h", 0),
-                "tvl_usd": token.get("liquidity_usd", 0),
-                "centralized_score": token.get("centralized_score", 0.5),
-                "value_usd": token.get("value_usd", 0),
-                "price_usd": token.get("price_usd", 0),
-                "amount": token.get("amount", 0)
-            }
-            
-            # Add derived features
-            
-            # Liquidity risk: low liquidity relative to position size is risky
-            position_to_liquidity_ratio = 0
-            if features["tvl_usd"] > 0:
-                position_to_liquidity_ratio = min(features["value_usd"] / features["tvl_usd"] * 100, 100)
-            features["position_liquidity_ratio"] = position_to_liquidity_ratio
-            
-            # Volatility adjusted by age: newly acquired volatile assets are riskier
-            age_factor = min(features["age_days"] / 30, 1)  # Cap at 1 month
-            features["volatility_age_adjusted"] = features["volatility_24h"] * (1 - age_factor * 0.5)
-            
-            # Concentration risk: high portfolio % + high centralization is risky
-            features["concentration_risk"] = (features["portfolio_pct"] / 100) * features["centralized_score"]
-            
-            features_list.append(features)
+            return pd.DataFrame()
+        
+        # Build each feature column directly with a known dtype (no pandas type
+        # inference over a list of dicts), filling defaults for missing fields
+        token_list = wallet_data["tokens"]
+        columns: Dict[str, Any] = {}
+        for field, (_, default) in self.TOKEN_FEATURES.items():
+            values = (default if (value := token.get(field)) is None else value for token in token_list)
+            if isinstance(default, str):
+                columns[field] = list(values)
+            else:
+                column = np.fromiter(values, dtype=np.float64, count=len(token_list))
+                column[np.isnan(column)] = default
+                columns[field] = column
+        tokens = pd.DataFrame(columns)
+        
+        # Skip tokens with zero or very low value
+        df = tokens[tokens["value_usd"] >= 0.01].reset_index(drop=True)
+        df = df.rename(columns={field: column for field, (column, _) in self.TOKEN_FEATURES.items()})
+        
+        # Add derived features
+        
+        # Liquidity risk: low liquidity relative to position size is risky
+        tvl = df["tvl_usd"].where(df["tvl_usd"] > 0)
+        df["position_liquidity_ratio"] = np.minimum(df["value_usd"] / tvl * 100, 100).fillna(0)
+        
+        # Volatility adjusted by age: newly acquired volatile assets are riskier
+        age_factor = np.minimum(df["age_days"] / 30, 1)  # Cap at 1 month
+        df["volatility_age_adjusted"] = df["volatility_24h"] * (1 - age_factor * 0.5)
+        
+        # Concentration risk: high portfolio % + high centralization is risky
+        df["concentration_risk"] = (df["portfolio_pct"] / 100) * df["centralized_score"]
         
-        return features_list
+        return df
     
-    def prepare_model_input(self, features_list: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    def scaler_params(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Linear parameters of the loaded scaler
+        
+        Returns:
+            (scale, min) such that scaled features are X * scale + min, or None
+            if no MinMax-style scaler is loaded
+        """
+        if self._scale is None:
+            return None
+        return np.asarray(self.scaler.scale_, dtype=np.float64), np.asarray(self.scaler.min_, dtype=np.float64)
+    
+    def prepare_model_input(self, features: pd.DataFrame, scale: bool = True) -> Tuple[np.ndarray, pd.DataFrame]:
         """
         Prepare features for model input, including scaling
         
         Args:
-            features_list: List of feature dictionaries from generate_features
+            features: DataFrame of features from generate_features
+            scale: Apply the feature scaler (False for models that take raw features)
             
         Returns:
-            DataFrame of scaled features ready for model input and the original features
+            Array of scaled features ready for model input and the original features
         """
-        if not features_list:
-            return pd.DataFrame(), []
-        
-        # Extract relevant numerical features for the model
-        model_features = [
-            "portfolio_pct", 
-            "age_days", 
-            "volatility_24h", 
-            "price_change_24h",
-            "tvl_usd", 
-            "centralized_score",
-            "position_liquidity_ratio",
-            "volatility_age_adjusted",
-            "concentration_risk"
-        ]
-        
-        # Create DataFrame from feature dictionaries
-        df = pd.DataFrame(features_list)
-        
-        # Handle missing values
-        for feature in model_features:
-            if feature in df.columns:
-                df[feature] = df[feature].fillna(0)
-        
-        # Select and reorder columns for model input
-        X = df[model_features].copy()
+        if features.empty:
+            return np.empty((0, 0)), features
+        
+        # Select and reorder columns for model input as float32 (half the bytes moved
+        # through scaling and prediction); generate_features has already filled
+        # missing values, so only absent columns need a default
+        X = features.reindex(columns=self.MODEL_FEATURES, fill_value=0).to_numpy(dtype=np.float32, copy=True)
         
         # Apply feature scaling if scaler is available
-        if self.scaler is not None:
+        if scale and self.scaler is not None:
             try:
-                X_scaled = self.scaler.transform(X)
-                X = pd.DataFrame(X_scaled, columns=model_features)
+                if self._scale is not None:
+                    # X is a fresh array, so scale (and clip) it in place without temporaries
+                    np.multiply(X, self._scale, out=X)
+                    np.add(X, self._min, out=X)
+                    if self._clip_range is not None:
+                        np.clip(X, *self._clip_range, out=X)
+                else:
+                    X = self.scaler.transform(X).astype(np.float32, copy=False)
             except Exception as e:
                 logger.error(f"Error scaling features: {str(e)}")
                 # Continue with unscaled features
         
-        return X, features_list
+        return X, features
     
     def determine_risk_action(self, risk_score: float, token_features: Dict[str, Any]) -> str:
         """
@@ -153,8 +186,6 @@ class FeatureEngineer:
         Returns:
             Recommended action: HOLD, BUY_COVER, or SWAP
         """
-        from app.api.models.request_models import RiskAction
-        
         # High risk tokens should be swapped
         if risk_score >= settings.HIGH_RISK_THRESHOLD:
             return RiskAction.SWAP
@@ -169,4 +200,27 @@ class FeatureEngineer:
         
         # Low risk tokens can be held
         else:
-            return RiskAction.HOLD
\ No newline at end of file
+            return RiskAction.HOLD
+    
+    def determine_risk_actions(self, risk_scores: np.ndarray, portfolio_pct: np.ndarray) -> np.ndarray:
+        """
+        Vectorized determine_risk_action over all tokens of a wallet
+        
+        Args:
+            risk_scores: Model output risk scores (0-100), one per token
+            portfolio_pct: Portfolio percentage, one per token
+            
+        Returns:
+            Object array of recommended actions: HOLD, BUY_COVER, or SWAP
+        """
+        # Same rules as determine_risk_action: swap high risk, hedge major
+        # medium-risk positions, hold everything else
+        choice = np.select(
+            [
+                risk_scores >= settings.HIGH_RISK_THRESHOLD,
+                (risk_scores >= settings.MEDIUM_RISK_THRESHOLD) & (portfolio_pct > 15),
+            ],
+            [2, 1],
+            default=0
+        )
+        return _RISK_ACTIONS[choice]
@@ -4,9 +4,12 @@ IRIS AI Risk Engine - Main FastAPI Application
 import time
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api.endpoints import evaluate, explain
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.data.ingestion import DataFetcher
+from app.models.llm import LLMExplainer
 
 # Set up logging
 logger = setup_logging()
@@ -16,6 +19,7 @@ app = FastAPI(
     title="IRIS AI Risk Engine",
     description="Real-time risk assessment for on-chain wallets",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -30,13 +34,24 @@ app.add_middleware(
 # Request timing middleware
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     response = await call_next(request)
-    process_time = time.time() - start_time
-    logger.info(f"Request processed in {process_time:.3f} seconds")
-    response.headers["X-Process-Time"] = str(process_time)
+    process_time_ms = (time.perf_counter_ns() - start_ns) / 1e6
+    logger.info("Request processed in %.3f ms", process_time_ms)
+    response.headers["X-Process-Time"] = f"{process_time_ms:.3f}"
     return response
 
+@app.on_event("startup")
+async def create_llm_explainer():
+    """Create the single LLM explainer (and its pooled HTTP session) shared by all requests"""
+    app.state.llm = await LLMExplainer().initialize()
+
+@app.on_event("shutdown")
+async def close_http_session():
+    """Close the shared upstream and LLM HTTP sessions once on shutdown"""
+    await DataFetcher.close()
+    await app.state.llm.close()
+
 # Include routers
 app.include_router(evaluate.router, prefix="/api/v1", tags=["risk"])
 app.include_router(explain.router, prefix="/api/v1", tags=["explanation"])
@@ -1,30 +1,86 @@
 """
 LLM integration for generating explanations of risk scores
 """
+import asyncio
 import logging
-import json
 import time
+import hashlib
 import aiohttp
+import orjson
+from cachetools import TTLCache
 from typing import Dict, List, Any, Optional
 import os
+from collections import ChainMap
+from operator import itemgetter
 
 from app.core.config import settings
 
 logger = logging.getLogger("llm")
 
+# Per-token prompt sections, filled by %-formatting a tuple of token fields
+AT_RISK_TOKEN_FMT = (
+    "Token: %s (%s)\n"
+    "Risk Score: %.2f/100\n"
+    "Portfolio %%: %.2f%%\n"
+    "Value: $%.2f\n"
+    "Volatility (24h): %.2f%%\n"
+    "Liquidity: $%s\n"  # preformatted with thousands separators
+    "Token Age: %.1f days\n"
+    "Centralization: %.2f/1.0\n"
+    "Recommended Action: %s"
+)
+SAFE_TOKEN_FMT = (
+    "Token: %s (%s)\n"
+    "Risk Score: %.2f/100\n"
+    "Portfolio %%: %.2f%%\n"
+    "Recommended Action: %s"
+)
+_AT_RISK_FIELDS = itemgetter(
+    "symbol", "name", "risk_score", "portfolio_percentage", "usd_value",
+    "volatility_24h", "liquidity_usd", "age_days", "centralized_score", "recommended_action"
+)
+_SAFE_FIELDS = itemgetter("symbol", "name", "risk_score", "portfolio_percentage", "recommended_action")
+
+# Values used for fields missing from a token (same as the former token.get calls)
+_TOKEN_DEFAULTS: Dict[str, Any] = {"symbol": None, "name": None, "recommended_action": None, "liquidity_usd": 0}
+
+def _token_fields(fields: itemgetter, token: Dict[str, Any]) -> tuple:
+    """Pick prompt fields from a token, falling back to _TOKEN_DEFAULTS for missing ones"""
+    try:
+        return fields(token)
+    except KeyError:
+        return fields(ChainMap(token, _TOKEN_DEFAULTS))
+
+def _risk_data_digest(risk_data: Dict[str, Any]) -> str:
+    """Stable hash of risk data (canonical orjson bytes, independent of PYTHONHASHSEED)"""
+    key_bytes = orjson.dumps(
+        risk_data,
+        default=str,
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+    return hashlib.blake2b(key_bytes, digest_size=8).hexdigest()
+
 class LLMExplainer:
     """Handles LLM-based explanations for risk assessments"""
     
     def __init__(self):
         """Initialize the LLM explainer"""
         self.session = None
-        self.cache = {}
+        self.cache = TTLCache(maxsize=settings.LLM_CACHE_SIZE, ttl=settings.LLM_CACHE_TTL)
+        self._inflight: Dict[str, asyncio.Future] = {}
     
     async def initialize(self):
-        """Initialize the HTTP session"""
+        """Initialize the HTTP session (keep-alive connection pool, reused across explanations)"""
         if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=32,
+                keepalive_timeout=75
+            )
             self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=settings.REQUEST_TIMEOUT)
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.REQUEST_TIMEOUT),
+                json_serialize=lambda obj: orjson.dumps(obj).decode()
             )
         return self
     
@@ -52,28 +108,14 @@ class LLMExplainer:
         
         tokens_info = []
         
-        # Add at-risk tokens first
+        # Add at-risk tokens first (% has no thousands separator, so liquidity is preformatted)
         for token in at_risk_tokens:
-            tokens_info.append(
-                f"Token: {token.get('symbol')} ({token.get('name')})\n"
-                f"Risk Score: {token.get('risk_score'):.2f}/100\n"
-                f"Portfolio %: {token.get('portfolio_percentage'):.2f}%\n"
-                f"Value: ${token.get('usd_value'):.2f}\n"
-                f"Volatility (24h): {token.get('volatility_24h'):.2f}%\n"
-                f"Liquidity: ${token.get('liquidity_usd', 0):,.2f}\n"
-                f"Token Age: {token.get('age_days'):.1f} days\n"
-                f"Centralization: {token.get('centralized_score'):.2f}/1.0\n"
-                f"Recommended Action: {token.get('recommended_action')}"
-            )
+            fields = _token_fields(_AT_RISK_FIELDS, token)
+            tokens_info.append(AT_RISK_TOKEN_FMT % (*fields[:6], format(fields[6], ",.2f"), *fields[7:]))
         
         # Add top 3 safe tokens (if any)
         for token in safe_tokens[:3]:
-            tokens_info.append(
-                f"Token: {token.get('symbol')} ({token.get('name')})\n"
-                f"Risk Score: {token.get('risk_score'):.2f}/100\n"
-                f"Portfolio %: {token.get('portfolio_percentage'):.2f}%\n"
-                f"Recommended Action: {token.get('recommended_action')}"
-            )
+            tokens_info.append(SAFE_TOKEN_FMT % _token_fields(_SAFE_FIELDS, token))
         
         token_details = "\n\n".join(tokens_info)
         
@@ -94,7 +136,7 @@ Based on this data, please provide:
 4. A bulleted list of 2-3 suggestions to improve portfolio safety
 
 Format your response as a JSON object with the following structure:
-{
+{{
   "wallet_address": "wallet address here",
   "overall_risk_score": overall_risk_score_as_float,
   "recommended_action": "HOLD or BUY_COVER or SWAP",
@@ -102,7 +144,7 @@ Format your response as a JSON object with the following structure:
   "confidence": confidence_score_as_float_between_0_and_1,
   "reason": "clear explanation of the risk assessment in 2-3 sentences",
   "suggestions": ["suggestion 1", "suggestion 2", "suggestion 3"]
-}
+}}
 """
         return prompt
     
@@ -122,10 +164,33 @@ Format your response as a JSON object with the following structure:
         wallet_address = risk_data.get("wallet_address", "unknown")
         
         # Check cache
-        cache_key = f"explain_{wallet_address}_{hash(str(risk_data))}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        cache_key = f"explain_{wallet_address}_{_risk_data_digest(risk_data)}"
+        # Single lookup: a TTLCache entry can expire between a check and a read
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
+        # Concurrent requests for the same explanation share a single LLM call
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._explain(cache_key, risk_data))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        
+        # Shielded so a cancelled caller doesn't cancel the LLM call for the others
+        return await asyncio.shield(task)
+    
+    async def _explain(self, cache_key: str, risk_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Call the configured LLM for an explanation and cache the result
+        
+        Args:
+            cache_key: Cache key for this risk assessment
+            risk_data: Risk assessment data
+            
+        Returns:
+            Dict containing the explanation
+        """
         prompt = self._create_prompt(risk_data)
         
         start_time = time.time()
@@ -184,13 +249,13 @@ Format your response as a JSON object with the following structure:
                     logger.error(f"OpenAI API error: {await response.text()}")
                     return self._generate_fallback_explanation({"prompt": prompt})
                 
-                data = await response.json()
+                data = orjson.loads(await response.read())
                 content = data["choices"][0]["message"]["content"]
                 
                 # Parse JSON response
                 try:
-                    return json.loads(content)
-                except json.JSONDecodeError:
+                    return orjson.loads(content)
+                except orjson.JSONDecodeError:
                     logger.error("Failed to parse LLM response as JSON")
                     # Extract data using regex or other methods if needed
                     return self._generate_fallback_explanation({"prompt": prompt})
@@ -224,7 +289,7 @@ Format your response as a JSON object with the following structure:
                     logger.error(f"LLaMA API error: {await response.text()}")
                     return self._generate_fallback_explanation({"prompt": prompt})
                 
-                data = await response.json()
+                data = orjson.loads(await response.read())
                 content = data.get("generation", "")
                 
                 # Ensure we have a complete JSON object
@@ -233,8 +298,8 @@ Format your response as a JSON object with the following structure:
                 
                 # Parse JSON response
                 try:
-                    return json.loads(content)
-                except json.JSONDecodeError:
+                    return orjson.loads(content)
+                except orjson.JSONDecodeError:
                     logger.error("Failed to parse LLM response as JSON")
                     return self._generate_fallback_explanation({"prompt": prompt})
                 
@@ -1,21 +1,43 @@
 """
 ML model prediction for risk assessment
 """
+import hashlib
 import logging
 import joblib
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 
 from app.core.config import settings
 from app.features.engineering import FeatureEngineer
 
 logger = logging.getLogger("model")
 
+# ONNX Runtime is optional: without it predictions run through scikit-learn
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
 class RiskPredictor:
     """Handles risk prediction using trained ML models"""
     
+    # Feature column -> token risk field, in output order
+    TOKEN_RISK_FIELDS: Dict[str, str] = {
+        "symbol": "symbol",
+        "mint": "mint",
+        "name": "name",
+        "risk_score": "risk_score",
+        "value_usd": "usd_value",
+        "portfolio_pct": "portfolio_percentage",
+        "volatility_24h": "volatility_24h",
+        "tvl_usd": "liquidity_usd",
+        "age_days": "age_days",
+        "centralized_score": "centralized_score",
+        "recommended_action": "recommended_action",
+    }
+    
     def __init__(
         self, 
         model_path: Path = settings.MODEL_PATH,
@@ -30,6 +52,8 @@ class RiskPredictor:
         """
         self.model_path = model_path
         self.model = None
+        self._ort = None
+        self._needs_scaling = True
         self.feature_engineer = feature_engineer or FeatureEngineer()
         self._load_model()
     
@@ -39,6 +63,8 @@ class RiskPredictor:
             if self.model_path.exists():
                 self.model = joblib.load(self.model_path)
                 logger.info(f"Loaded model from {self.model_path}")
+                self._needs_scaling = not self._fold_scaler_into_trees()
+                self._ort = self._load_onnx_session()
             else:
                 logger.error(f"Model not found at {self.model_path}")
                 raise FileNotFoundError(f"Model not found at {self.model_path}")
@@ -46,6 +72,123 @@ class RiskPredictor:
             logger.error(f"Error loading model: {str(e)}")
             raise
     
+    def _fold_scaler_into_trees(self) -> bool:
+        """
+        Rewrite the split thresholds of a tree ensemble to take unscaled features
+        
+        A split x' <= t on a MinMax-scaled feature x' = x * scale + min is the same
+        split as x <= (t - min) / scale, so for tree models the scaler is folded
+        into the thresholds once here and the per-request scaling pass is skipped.
+        Any other model (e.g. a linear model) keeps _needs_scaling and gets scaled
+        input as before.
+        
+        Returns:
+            True if the scaler was folded into the model
+        """
+        params = self.feature_engineer.scaler_params()
+        if params is None or not hasattr(self.model, "estimators_"):
+            return False
+        
+        trees = np.ravel(self.model.estimators_)
+        if not all(hasattr(tree, "tree_") for tree in trees):
+            return False
+        
+        # Bagging-style ensembles fit each tree on a subset of the input columns,
+        # so tree feature indices must be mapped back to model input columns
+        tree_columns = getattr(self.model, "estimators_features_", None)
+        
+        scale, offset = params
+        for i, tree in enumerate(trees):
+            split = tree.tree_.feature >= 0  # leaves have feature -2
+            feature = tree.tree_.feature[split]
+            if tree_columns is not None:
+                feature = np.asarray(tree_columns[i])[feature]
+            tree.tree_.threshold[split] = (tree.tree_.threshold[split] - offset[feature]) / scale[feature]
+        
+        logger.info("Folded feature scaling into tree thresholds, skipping input scaling")
+        return True
+    
+    def _onnx_cache_path(self) -> Path:
+        """
+        Path of the ONNX conversion cached next to the model
+        
+        The file name carries a hash of the model pickle, and of the scaler
+        parameters when they are folded into the trees, so a retrained model or
+        refit scaler is converted again instead of reusing a stale ONNX file.
+        
+        Returns:
+            Path of the cached .onnx file for the loaded model
+        """
+        digest = hashlib.blake2b(self.model_path.read_bytes(), digest_size=8)
+        if not self._needs_scaling:
+            # The folded thresholds depend on the scaler as well as the model
+            for param in self.feature_engineer.scaler_params():
+                digest.update(param.tobytes())
+        suffix = "onnx" if self._needs_scaling else "unscaled.onnx"
+        return self.model_path.with_name(f"{self.model_path.stem}.{digest.hexdigest()}.{suffix}")
+    
+    def _load_onnx_session(self):
+        """
+        Load an ONNX Runtime session for the model, converting it on first use
+        
+        Converts the loaded scikit-learn model with skl2onnx and caches the result
+        next to it, keyed by the model's contents (see _onnx_cache_path).
+        
+        Returns:
+            onnxruntime.InferenceSession, or None to predict with scikit-learn
+        """
+        if onnxruntime is None:
+            return None
+        
+        try:
+            onnx_path = self._onnx_cache_path()
+            if not onnx_path.exists():
+                from skl2onnx import convert_sklearn
+                from skl2onnx.common.data_types import FloatTensorType
+                
+                n_features = getattr(self.model, "n_features_in_", len(FeatureEngineer.MODEL_FEATURES))
+                # Without zipmap, probabilities come back as a plain (n, classes) array
+                options = {id(self.model): {"zipmap": False}} if hasattr(self.model, "predict_proba") else None
+                onnx_model = convert_sklearn(
+                    self.model,
+                    initial_types=[("input", FloatTensorType([None, n_features]))],
+                    options=options
+                )
+                onnx_path.write_bytes(onnx_model.SerializeToString())
+                logger.info(f"Converted model to ONNX at {onnx_path}")
+            
+            session = onnxruntime.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"])
+            self._ort_input = session.get_inputs()[0].name
+            logger.info(f"Loaded ONNX model from {onnx_path}")
+            return session
+        except Exception as e:
+            logger.warning(f"ONNX Runtime unavailable for {self.model_path}, using scikit-learn: {str(e)}")
+            return None
+    
+    def _predict_onnx(self, X: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Predict risk scores (0-100) with ONNX Runtime
+        
+        Args:
+            X: Scaled float32 model input
+            
+        Returns:
+            Array of risk scores, or None if ONNX prediction failed
+        """
+        try:
+            outputs = self._ort.run(None, {self._ort_input: X})
+            if hasattr(self.model, "predict_proba"):
+                # Probability of the high-risk class (index 1)
+                scores = np.asarray(outputs[1], dtype=np.float64)[:, 1]
+            else:
+                scores = np.asarray(outputs[0], dtype=np.float64).ravel()
+            # ORT computes in float32: round off its noise (e.g. 0.55000007) so scores
+            # match scikit-learn on risk thresholds, and keep them within 0-100
+            return np.clip(np.round(scores, 6) * 100, 0, 100)
+        except Exception as e:
+            logger.warning(f"ONNX prediction failed, using scikit-learn: {str(e)}")
+            return None
+    
     def predict_risk(self, wallet_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Predict risk for all tokens in a wallet
@@ -57,9 +200,9 @@ class RiskPredictor:
             Dict containing risk scores and recommendations
         """
         # Generate features for each token
-        features_list = self.feature_engineer.generate_features(wallet_data)
+        features = self.feature_engineer.generate_features(wallet_data)
         
-        if not features_list:
+        if features.empty:
             logger.warning(f"No features generated for wallet {wallet_data.get('wallet_address')}")
             return {
                 "wallet_address": wallet_data.get("wallet_address"),
@@ -70,9 +213,9 @@ class RiskPredictor:
             }
         
         # Prepare model input
-        X, original_features = self.feature_engineer.prepare_model_input(features_list)
+        X, features = self.feature_engineer.prepare_model_input(features, scale=self._needs_scaling)
         
-        if X.empty:
+        if len(X) == 0:
             logger.warning("Empty feature matrix after preparation")
             return {
                 "wallet_address": wallet_data.get("wallet_address"),
@@ -84,69 +227,62 @@ class RiskPredictor:
         
         # Make predictions
         try:
-            # For random forest, predict_proba returns probability for each class
-            # We're interested in the probability of the high-risk class (index 1)
-            if hasattr(self.model, 'predict_proba'):
-                risk_probas = self.model.predict_proba(X)
-                # Convert to risk scores (0-100)
-                risk_scores = [float(proba[1] * 100) for proba in risk_probas]
-            else:
-                # Fallback for non-probabilistic models
-                risk_preds = self.model.predict(X)
-                # Convert to risk scores (0-100)
-                risk_scores = [float(pred * 100) for pred in risk_preds]
+            # Prefer ONNX Runtime when available, otherwise predict with scikit-learn
+            risk_scores = self._predict_onnx(X) if self._ort is not None else None
+            
+            if risk_scores is None:
+                # For random forest, predict_proba returns probability for each class
+                # We're interested in the probability of the high-risk class (index 1)
+                if hasattr(self.model, 'predict_proba'):
+                    risk_probas = self.model.predict_proba(X)
+                    # Convert to risk scores (0-100)
+                    risk_scores = risk_probas[:, 1] * 100
+                else:
+                    # Fallback for non-probabilistic models
+                    risk_preds = self.model.predict(X)
+                    # Convert to risk scores (0-100)
+                    risk_scores = np.asarray(risk_preds, dtype=np.float64) * 100
         except Exception as e:
             logger.error(f"Error making predictions: {str(e)}")
             # Fallback to a heuristic risk score based on raw features
-            risk_scores = self._calculate_heuristic_risk(original_features)
+            risk_scores = self._calculate_heuristic_risk(features)
         
         # Assign risk scores to tokens and determine actions
-        token_risks = []
-        for i, features in enumerate(original_features):
-            risk_score = risk_scores[i]
-            action = self.feature_engineer.determine_risk_action(risk_score, features)
-            
-            token_risk = {
-                "symbol": features["symbol"],
-                "mint": features["mint"],
-                "name": features.get("name", "Unknown Token"),
-                "risk_score": risk_score,
-                "usd_value": features["value_usd"],
-                "portfolio_percentage": features["portfolio_pct"],
-                "volatility_24h": features["volatility_24h"],
-                "liquidity_usd": features["tvl_usd"],
-                "age_days": features["age_days"],
-                "centralized_score": features["centralized_score"],
-                "recommended_action": action
-            }
-            
-            token_risks.append(token_risk)
+        risk_array = np.asarray(risk_scores, dtype=np.float64)
+        portfolio_pct = features["portfolio_pct"].to_numpy(dtype=np.float64)
+        actions = self.feature_engineer.determine_risk_actions(risk_array, portfolio_pct)
+        token_frame = features.assign(risk_score=risk_array, recommended_action=actions)
         
-        # Sort by risk score (descending)
-        token_risks.sort(key=lambda x: x["risk_score"], reverse=True)
+        token_records = token_frame[list(self.TOKEN_RISK_FIELDS)].rename(columns=self.TOKEN_RISK_FIELDS)
         
         # Calculate overall wallet risk score (weighted by portfolio percentage)
-        total_weight = sum(token["portfolio_percentage"] for token in token_risks)
+        total_weight = portfolio_pct.sum()
         
         if total_weight > 0:
-            overall_risk = sum(token["risk_score"] * token["portfolio_percentage"] for token in token_risks) / total_weight
+            overall_risk = (risk_array @ portfolio_pct) / total_weight
         else:
-            overall_risk = 0
+            overall_risk = 0.0
         
         # Determine overall wallet action based on highest risk token with significant position
-        significant_tokens = [t for t in token_risks if t["portfolio_percentage"] >= 5]
-        if significant_tokens:
-            overall_action = max(significant_tokens, key=lambda x: x["risk_score"])["recommended_action"]
+        significant = portfolio_pct >= 5
+        if significant.any():
+            overall_action = actions[significant][risk_array[significant].argmax()]
         else:
             overall_action = "HOLD"
         
-        # Split tokens into at-risk and safe categories
-        at_risk_tokens = [t for t in token_risks if t["risk_score"] >= settings.MEDIUM_RISK_THRESHOLD]
-        safe_tokens = [t for t in token_risks if t["risk_score"] < settings.MEDIUM_RISK_THRESHOLD]
+        # Split tokens into at-risk and safe categories with one mask, then sort each
+        # (usually small) group by risk score, descending and stable for ties
+        at_risk = risk_array >= settings.MEDIUM_RISK_THRESHOLD
+        at_risk_idx = np.flatnonzero(at_risk)
+        safe_idx = np.flatnonzero(~at_risk)
+        at_risk_idx = at_risk_idx[np.argsort(-risk_array[at_risk_idx], kind="stable")]
+        safe_idx = safe_idx[np.argsort(-risk_array[safe_idx], kind="stable")]
+        at_risk_tokens = token_records.iloc[at_risk_idx].to_dict(orient="records")
+        safe_tokens = token_records.iloc[safe_idx].to_dict(orient="records")
         
         result = {
             "wallet_address": wallet_data.get("wallet_address"),
-            "overall_risk_score": float(overall_risk),
+            "overall_risk_score": overall_risk,
             "recommended_action": overall_action,
             "at_risk_tokens": at_risk_tokens,
             "safe_tokens": safe_tokens
@@ -154,44 +290,39 @@ class RiskPredictor:
         
         return result
     
-    def _calculate_heuristic_risk(self, features_list: List[Dict[str, Any]]) -> List[float]:
+    def _calculate_heuristic_risk(self, features: pd.DataFrame) -> List[float]:
         """
         Calculate risk scores using heuristics when model prediction fails
         
         Args:
-            features_list: List of token features
+            features: DataFrame of token features
             
         Returns:
             List of risk scores (0-100)
         """
-        risk_scores = []
+        volatility_24h = features["volatility_24h"].to_numpy(dtype=np.float64)
+        price_change_24h = features["price_change_24h"].to_numpy(dtype=np.float64)
+        tvl_usd = features["tvl_usd"].to_numpy(dtype=np.float64)
+        centralized_score = features["centralized_score"].to_numpy(dtype=np.float64)
+        age_days = features["age_days"].to_numpy(dtype=np.float64)
         
-        for features in features_list:
-            # Base risk starts at 30 (moderate)
-            risk = 30.0
-            
-            # High volatility increases risk
-            risk += min(features["volatility_24h"] * 5, 30)
-            
-            # Price decline increases risk
-            if features["price_change_24h"] < 0:
-                risk += min(abs(features["price_change_24h"]) * 2, 20)
-            
-            # Low liquidity increases risk
-            liquidity_factor = 0
-            if features["tvl_usd"] > 0:
-                liquidity_factor = min(5000000 / features["tvl_usd"], 20)
-            risk += liquidity_factor
-            
-            # High centralization increases risk
-            risk += features["centralized_score"] * 10
-            
-            # New tokens are riskier
-            if features["age_days"] < 30:
-                risk += max(0, (30 - features["age_days"]) * 0.5)
-            
-            # Cap risk score at 0-100
-            risk = max(0, min(100, risk))
-            risk_scores.append(risk)
+        # Base risk starts at 30 (moderate)
+        risk = np.full(len(features), 30.0)
+        
+        # High volatility increases risk
+        risk += np.minimum(volatility_24h * 5, 30)
+        
+        # Price decline increases risk
+        risk += np.where(price_change_24h < 0, np.minimum(np.abs(price_change_24h) * 2, 20), 0)
+        
+        # Low liquidity increases risk (no liquidity data adds nothing)
+        risk += np.minimum(5000000 / np.where(tvl_usd > 0, tvl_usd, np.inf), 20)
+        
+        # High centralization increases risk
+        risk += centralized_score * 10
+        
+        # New tokens are riskier
+        risk += np.where(age_days < 30, np.maximum(0, 30 - age_days) * 0.5, 0)
         
-        return risk_scores
\ No newline at end of file
+        # Cap risk score at 0-100
+        return np.clip(risk, 0, 100).tolist()
@@ -0,0 +1,24 @@
+"""
+Tests for data ingestion helpers
+"""
+from app.data.ingestion import _stable_hash
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+def _fnv1a(key: str) -> int:
+    """Reference scalar FNV-1a 64-bit hash"""
+    h = 14695981039346656037
+    for byte in key.encode():
+        h = ((h ^ byte) * 1099511628211) % 2**64
+    return h
+
+def test_stable_hash_matches_fnv1a():
+    keys = [SOL_MINT, USDC_MINT, "abc", "x"]
+    assert _stable_hash(keys).tolist() == [_fnv1a(key) for key in keys]
+
+def test_stable_hash_independent_of_batch():
+    alone = _stable_hash([SOL_MINT])[0]
+    assert len(SOL_MINT) != len(USDC_MINT)
+    assert _stable_hash([SOL_MINT, USDC_MINT])[0] == alone
+    assert _stable_hash([USDC_MINT, "x", SOL_MINT])[2] == alone
@@ -0,0 +1,41 @@
+"""
+Tests for the risk model
+"""
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import BaggingClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.preprocessing import MinMaxScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from app.features.engineering import FeatureEngineer
+from app.models.predictor import RiskPredictor
+
+@pytest.mark.parametrize("model", [
+    RandomForestClassifier(n_estimators=20, random_state=0),
+    GradientBoostingClassifier(n_estimators=20, random_state=0),
+    BaggingClassifier(DecisionTreeClassifier(), n_estimators=20, max_features=0.6, random_state=0),
+])
+def test_folded_tree_model_matches_scaled_input(tmp_path, model):
+    rng = np.random.default_rng(0)
+    n_features = len(FeatureEngineer.MODEL_FEATURES)
+    X = rng.random((500, n_features)) * rng.uniform(1, 1e6, n_features)
+    y = (X[:, 2] / X[:, 2].max() + rng.random(500) > 1).astype(int)
+    
+    scaler = MinMaxScaler().fit(X)
+    model.fit(scaler.transform(X).astype(np.float32), y)
+    joblib.dump(scaler, tmp_path / "scaler.pkl")
+    joblib.dump(model, tmp_path / "model.pkl")
+    
+    feature_engineer = FeatureEngineer(scaler_path=tmp_path / "scaler.pkl")
+    predictor = RiskPredictor(model_path=tmp_path / "model.pkl", feature_engineer=feature_engineer)
+    assert not predictor._needs_scaling
+    
+    features = pd.DataFrame(X, columns=list(FeatureEngineer.MODEL_FEATURES))
+    X_scaled, _ = feature_engineer.prepare_model_input(features)
+    X_raw, _ = feature_engineer.prepare_model_input(features, scale=False)
+    np.testing.assert_allclose(
+        predictor.model.predict_proba(X_raw),
+        joblib.load(tmp_path / "model.pkl").predict_proba(X_scaled)
+    )